@@ -0,0 +1,17 @@
+"""
+Run all of the fill_form examples, each in its own process.
+"""
+import os, runpy
+from concurrent.futures import ProcessPoolExecutor
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = sorted(name for name in os.listdir(HERE) if name.startswith('fill_form_') and name.endswith('.py'))
+
+def run(example):
+    runpy.run_path(os.path.join(HERE, example))
+    return example
+
+if __name__ == '__main__':
+    # The examples share no state, so they can be filled in parallel
+    with ProcessPoolExecutor() as executor:
+        for example in executor.map(run, EXAMPLES):
+            print(f'Finished {example}')
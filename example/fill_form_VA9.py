@@ -1,9 +1,9 @@
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pikepdf import Pdf
+import os
+HERE = os.path.dirname(os.path.abspath(__file__))
+from pikepdf import Pdf, ObjectStreamMode
 from pdform import fill_form
 
-pdf = Pdf.open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdfs', 'VA9.pdf'))
+pdf = Pdf.open(os.path.join(HERE, 'pdfs', 'VA9.pdf'))
 fill_form(pdf, {
     # ===== Page 1 ===== #
     # 1. NAME OF VETERAN (Last Name, First Name, Middle Initial)re you fill out this form.  V A also encourages you to get assistance from your representative in filling out this form.
@@ -49,15 +49,15 @@ fill_form(pdf, {
 
     ".stamps": [
         {
-            'img': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'duck.jpg'),
+            'img': os.path.join(HERE, 'resources', 'duck.jpg'),
             'page': 1,
             'rect': [36, 30, 234, 59],
         },
         {
-            'img': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'sigtest.jpg'),
+            'img': os.path.join(HERE, 'resources', 'sigtest.jpg'),
             'page': 1,
             'rect': [303, 30, 504, 59],
         }
     ]
 })
-pdf.save(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'fill_form_VA9.pdf'))
\ No newline at end of file
+pdf.save(os.path.join(HERE, 'output', 'fill_form_VA9.pdf'), object_stream_mode=ObjectStreamMode.generate)
\ No newline at end of file
@@ -1,9 +1,9 @@
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pikepdf import Pdf
+import os
+HERE = os.path.dirname(os.path.abspath(__file__))
+from pikepdf import Pdf, ObjectStreamMode
 from pdform import fill_form
 
-pdf = Pdf.open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdfs', 'VBA-21-22-ARE.pdf'))
+pdf = Pdf.open(os.path.join(HERE, 'pdfs', 'VBA-21-22-ARE.pdf'))
 fill_form(pdf, {
     # 3. V. A. File Number (if applicable). Enter nine digit file number.",
     "F[0].Page_1[0].VAFileNumber[0]": "123456789",
@@ -94,9 +94,9 @@ fill_form(pdf, {
     # SECTION 4: AUTHORIZATION INFORMATION. 19. AUTHORIZATION FOR REPRESENTATIVE'S ACCESS TO RECORDS PROTECTED BY SECTION 73 32, TITLE 38, U. S. C. - By checking the box below I authorize V. A. to disclose to the service organization named on this appointment form any records  that may be in my file relating to treatment for drug abuse, alcoholism or alcohol abuse, infection with the human immunodeficiency virus (H I V), or sickle cell anemia. I authorize the V. A. facility having custody of my V. A. claimant records to disclose to the service organization named in Item 15 all treatment records relating to drug abuse, alcoholism or alcohol abuse, infection with the human immunodeficiency virus (H I V), or sickle cell anemia. Redisclosure of these records by my service organization representative, other than to V. A. or the Court of Appeals for Veterans Claims, is not authorized without my further written consent. This authorization will remain in effect until the earlier of the following events: (1) I revoke this authorization by filing a written revocation with V. A.; or (2) I revoke the appointment of the service organization named in Item 15, either by explicit revocation or the appointment of another representative.",
     "F[0].Page_2[0].I_Authorize[1]": True,
     # SECTION 5: SIGNATURES. NOTE: THIS POWER OF ATTORNEY DOES NOT REQUIRE EXECUTION BEFORE A NOTARY PUBLIC. 22. A. SIGNATURE OF VETERAN OR CLAIMANT (Do Not Print). This is a digital signature field.",
-    "F[0].Page_2[0].SignatureField1[0]": os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'sigtest.jpg'),
+    "F[0].Page_2[0].SignatureField1[0]": os.path.join(HERE, 'resources', 'sigtest.jpg'),
     # 23. A. SIGNATURE OF VETERANS SERVICE ORGANIZATION REPRESENTATIVE NAMED IN ITEM 16. A. (Do Not Print). This is a digital signature field.",
-    "F[0].Page_2[0].SignatureField1[1]": os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'duck.jpg'),
+    "F[0].Page_2[0].SignatureField1[1]": os.path.join(HERE, 'resources', 'duck.jpg'),
     # 22B. DATE SIGNED. Enter 2 digit month, 2 digit day and 4 digit year.",
     "F[0].Page_2[0].DateSigned[0]": "12/24/2024",
     # 23B. DATE SIGNED. Enter 2 digit month, 2 digit day and 4 digit year.",
@@ -108,4 +108,4 @@ fill_form(pdf, {
     # 2. Veteran's Social Security Number. Enter last four numbers.",
     "F[0].Page_2[0].SocialSecurityNumber_LastFourNumbers[0]": "6789",
 })
-pdf.save(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'fill_form_VBA-21-22-ARE.pdf'))
+pdf.save(os.path.join(HERE, 'output', 'fill_form_VBA-21-22-ARE.pdf'), object_stream_mode=ObjectStreamMode.generate)
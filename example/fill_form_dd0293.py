@@ -1,9 +1,9 @@
-import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pikepdf import Pdf
+import os
+HERE = os.path.dirname(os.path.abspath(__file__))
+from pikepdf import Pdf, ObjectStreamMode
 from pdform import fill_form
 
-pdf = Pdf.open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdfs', 'dd0293.pdf'))
+pdf = Pdf.open(os.path.join(HERE, 'pdfs', 'dd0293.pdf'))
 fill_form(pdf, {
     # CASE NUMBER
     "form1[0].page1[0].TextField1[0]":"123456789",
@@ -208,8 +208,8 @@ fill_form(pdf, {
     # Select for \"NO.\"
     "form1[0].page2[0].CheckBox1[9]":False,
     # 25b. SIGNATURE (Required)
-    "form1[0].page2[0].SignatureField1[0]":os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'sigtest.jpg'),
+    "form1[0].page2[0].SignatureField1[0]":os.path.join(HERE, 'resources', 'sigtest.jpg'),
     # 25c. DATE SIGNED (YYYYMMDD)
     "form1[0].page2[0].DateField3[0]":"20230220",
 })
-pdf.save(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'fill_form_dd0293.pdf'))
\ No newline at end of file
+pdf.save(os.path.join(HERE, 'output', 'fill_form_dd0293.pdf'), object_stream_mode=ObjectStreamMode.generate)
\ No newline at end of file
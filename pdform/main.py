@@ -41,10 +41,12 @@ def cli_inspect_form(args):
     from json import dumps
     pdf = Pdf.open(args.pdf)
     info = []
+    # Shared between fields, so the names of common ancestors are only built once
+    names = {}
     for field in iter_fields(pdf, pdf.Root.AcroForm.Fields):
         field = Field(pdf, field)
         info.append({
-            'qualified_name':field.qualified_name,
+            'qualified_name':Field.get_qualified_field_name(field.raw, names),
             'label': str(field.raw.TU),
             'input_type': field.input_type.value,
             'required': field.required,
@@ -1,6 +1,7 @@
 from pikepdf import Array, Dictionary
 from typing import Union, Type
 from weakref import WeakValueDictionary
+from collections.abc import MutableSequence
 from ..utils.dictionaries import get_inheritable
 
 class Wrapper:
@@ -12,82 +13,114 @@ class Wrapper:
     raw:Union[Dictionary,Array]
     pdf:Dictionary
     def __new__(cls, pdf, raw:Union[Dictionary,Array], *args, **kwargs):
-        addr = id(raw)
-        instance = cls._instances.get(addr)
+        # pikepdf objects can be neither hashed nor weakly referenced, so they can't be keys
+        # themselves. Indirect objects are identified by their object number instead, so that the
+        # new Python object pikepdf returns on every access to the same PDF object still shares a
+        # wrapper. Direct objects have no identity other than the Python object. The class is part
+        # of the key, so that e.g. a Rect and an ArrayWrapper of the same array are kept apart.
+        # (Each instance holds `pdf` and `raw`, so neither id can be reused while it is alive)
+        objgen = raw.objgen
+        if objgen == (0, 0):
+            key = (cls, id(raw))
+        else:
+            key = (cls, id(pdf), objgen)
+        instance = cls._instances.get(key)
         if instance is None:
             instance = super().__new__(cls)
             instance.pdf = pdf
             instance.raw = raw
-            cls._instances[addr] = instance
+            cls._instances[key] = instance
         return instance
 
 
-class ArrayWrapper(Wrapper):
+def _unwrap(value):
+    """
+    Get the raw PDF object to store for a value which may be a `Wrapper`.
+    """
+    # `isinstance` is the cheap check here: `getattr(value, 'raw', value)` would make pikepdf
+    # search a dictionary for a /raw key, which takes around a hundred times as long
+    if isinstance(value, Wrapper):
+        return value.raw
+    return value
+
+
+class ArrayWrapper(Wrapper, MutableSequence):
     raw:Array
+    def __new__(cls, pdf, raw:Array, contained_type):
+        # Not shared through `Wrapper._instances`: the same array may be wrapped with different
+        # contained types, and re-running `__init__` on a shared instance would change the type 
+        # for everyone holding it. Array wrappers keep no state besides `raw` anyway.
+        instance = object.__new__(cls)
+        instance.pdf = pdf
+        instance.raw = raw
+        return instance
+
     def __init__(self, pdf, raw, contained_type):
         self.contained_type = contained_type
-        super().__init__(pdf, raw)
-    
-    def _wrap(self, value):
-        if isinstance(self.contained_type, type) and issubclass(self.contained_type, Wrapper):
-            return self.contained_type(self.pdf, value)
+        # Decide how to wrap items once, rather than checking their type on every access
+        if isinstance(contained_type, type) and issubclass(contained_type, Wrapper):
+            self._wrap = lambda value: contained_type(pdf, value)
         else:
-            return self.contained_type(value)
-    def _unwrap(self, value):
-        if isinstance(value, Wrapper):
-            return value.raw
-        else:
-            return value
+            self._wrap = contained_type
     
     def __getitem__(self, key):
         return self._wrap(self.raw.__getitem__(key))
     def __setitem__(self, key, value):
-        return self.raw.__setitem__(key, self._unwrap(value))
+        return self.raw.__setitem__(key, _unwrap(value))
     def __delitem__(self, key):
         return self.raw.__delitem__(key)
-    # TODO isn't there some mixin class somewhere in the standard library to implement all the remaining list methods?
+    def __len__(self):
+        return len(self.raw)
+    def __iter__(self):
+        wrap = self._wrap
+        return (wrap(value) for value in self.raw)
+    def insert(self, index, value):
+        return self.raw.insert(index, _unwrap(value))
+    # The remaining list methods come from `MutableSequence`, but these can go straight to `raw`
     def append(self, value):
-        return self.raw.append(self._unwrap(value))
+        return self.raw.append(_unwrap(value))
+    def extend(self, values):
+        return self.raw.extend([_unwrap(value) for value in values])
     def pop(self, *args):
         return self._wrap(self.raw.pop(*args))
 
+
 class WrappedProperty:
     """
     This is a special type of property designed to work in conjunction with the ``Wrapper`` class 
     to automatically wrap values from ``raw``.
     """
+    # Looked up on every access, so keep them in slots rather than an instance dict
+    __slots__ = ('key', 'wrapper', 'default', 'inheritable', '_needs_pdf', '_lookup')
     def __init__(self, key, wrapper, default=None, inheritable=False):
         self.default = default
         self.key = key
         self.wrapper = wrapper
         self.inheritable = inheritable
-    
-    def _wrap(self, instance, value):
-        if isinstance(self.wrapper, type) and issubclass(self.wrapper, Wrapper):
-            return self.wrapper(instance.pdf, value)
+        # Decide how to wrap values once, rather than checking the wrapper's type on every access
+        self._needs_pdf = isinstance(wrapper, type) and issubclass(wrapper, Wrapper)
+        # Likewise decide where to look the value up, returning None if it is not set
+        if inheritable:
+            self._lookup = lambda raw: get_inheritable(raw, key)
+        elif isinstance(key, int):
+            # An index into an array, e.g. the coordinates of a `Rect`
+            self._lookup = lambda raw: raw[key]
         else:
-            return self.wrapper(value)
+            # Test with `in` rather than catching a KeyError or using `get`, since optional keys
+            # are often missing, and pikepdf is many times slower than `in` either way for those
+            self._lookup = lambda raw: raw[key] if key in raw else None
     
-    def _unwrap(self, value):
-        if isinstance(value, Wrapper):
-            return value.raw
-        else:
-            return value
-
     def __get__(self, instance:Wrapper, owner):
-        if self.inheritable:
-            to_wrap = get_inheritable(instance.raw, self.key)
-            if to_wrap is None:
-                return self.default
-        else:
-            try:
-                to_wrap = instance.raw[self.key]
-            except KeyError:
-                return self.default
-        return self._wrap(instance, to_wrap)
+        to_wrap = self._lookup(instance.raw)
+        if to_wrap is None:
+            return self.default
+        # Call the wrapper directly; this is hot enough that an extra call per access shows
+        if self._needs_pdf:
+            return self.wrapper(instance.pdf, to_wrap)
+        return self.wrapper(to_wrap)
     
     def __set__(self, instance:Wrapper, value):
-        instance.raw[self.key] = self._unwrap(value)
+        instance.raw[self.key] = _unwrap(value)
 
     def __delete__(self, instance):
         try:
@@ -97,10 +130,9 @@ class WrappedProperty:
 
 
 class WrappedArrayProperty(WrappedProperty):
+    __slots__ = ('contained_wrapper',)
     def __init__(self, key, contained_wrapper):
-        super().__init__(key, ArrayWrapper)
+        super().__init__(key, lambda pdf, value: ArrayWrapper(pdf, value, contained_wrapper))
+        self._needs_pdf = True
         self.contained_wrapper = contained_wrapper
-    
-    def _wrap(self, instance, value):
-        return ArrayWrapper(instance.pdf, value, self.contained_wrapper)
     
\ No newline at end of file
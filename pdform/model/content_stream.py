@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Union,List
+from typing import Iterable,Union,List
 from pikepdf import Array,Dictionary,Name,String,Object
 from enum import Enum,IntEnum
 from dataclasses import dataclass
@@ -29,15 +29,15 @@ class Operator(str, Enum): # We can just use StrEnum in Python 3.11
     # Special graphics state (Table 57)
     push_stack='q'
     pop_stack='Q'
-    set_transform_matrix='cm',
+    set_transform_matrix='cm'
     # Path construction (Table 59)
-    move='m',
-    append_line='l',
-    append_cubic_bezier='c',
-    append_cubic_bezier_initial='v',
-    append_cubic_bezier_final='y',
+    move='m'
+    append_line='l'
+    append_cubic_bezier='c'
+    append_cubic_bezier_initial='v'
+    append_cubic_bezier_final='y'
     append_closing_line='h'
-    append_rectangle='re',
+    append_rectangle='re'
     # Path painting (Table 60)
     stroke='S'
     close_and_stroke='s'
@@ -84,10 +84,10 @@ class Operator(str, Enum): # We can just use StrEnum in Python 3.11
     set_nonstroke_color_name='scn'
     set_stroke_color_gray='G'
     set_nonstroke_color_gray='g'
-    set_stroke_color_rgb='RG',
-    set_nonstroke_color_rgb='rg',
-    set_stroke_color_cymk='K',
-    set_nonstroke_color_cymk='k',
+    set_stroke_color_rgb='RG'
+    set_nonstroke_color_rgb='rg'
+    set_stroke_color_cymk='K'
+    set_nonstroke_color_cymk='k'
     # Shading patterns (Table 77)
     paint_shading='sh' 
     # Inline images (Table 92)
@@ -107,11 +107,20 @@ class Operator(str, Enum): # We can just use StrEnum in Python 3.11
     end_compatibility='EX' 
 
     def __call__(self, *operands):
+        if not operands:
+            return _NULLARY[self]
         return Operation(self, operands)
     
     def __str__(self):
         return self.value
 
+# The operators by their value, for `ContentStream.operation`. `Operator(value)` goes through the 
+# whole `Enum` call machinery, while this is a single dict lookup. (Since `Operator` is a `str` 
+# subclass, members can also be looked up here directly)
+_OPERATORS = {operator.value: operator for operator in Operator}
+# The operators as they are written in a stream, so they are only encoded once
+_OPERATOR_BYTES = {operator: operator.value.encode() for operator in Operator}
+
 class TextRenderMode(IntEnum):
     """
     See 9.3.6 "Text Rendering Mode"
@@ -126,28 +135,78 @@ class TextRenderMode(IntEnum):
     clip=7
 
 
+def format_number(value:Union[int,float])->bytes:
+    """
+    Write a number for a content stream. PDF numbers have no exponent form (See 7.3.3), so tiny or
+    huge floats that Python would write as e.g. ``2.842170943040401e-14`` are written out in 
+    fixed-point instead, with anything below ``1e-10`` coming out as ``0``.
+    """
+    text = repr(value)
+    if 'e' in text:
+        text = f'{value:.10f}'.rstrip('0').rstrip('.')
+        if text == '-0':
+            text = '0'
+    return text.encode()
+
+
 @dataclass
 class Operation:
     """
     Represents a operation in a PDF content stream. See 8.2 and 9.4.
+
+    Operations without operands (e.g. ``q``), as returned by calling an `Operator` with none, are
+    shared by every stream that uses them, so they can't be changed.
     """
+    # Streams hold many of these, so don't give each one an instance dict
+    __slots__ = ('operator', 'operands')
     operator:Operator
     operands:List[Union[Array,Dictionary,Name,String,int,float]]
 
+    def _tokens(self)->List[bytes]:
+        """
+        The serialized operands of this operation, followed by its operator.
+        """
+        tokens = [
+            operand.unparse() if isinstance(operand, Object)
+            else format_number(operand) if isinstance(operand, float)
+            else str(operand).encode()
+            for operand in self.operands
+        ]
+        operator = _OPERATOR_BYTES.get(self.operator)
+        tokens.append(str(self.operator).encode() if operator is None else operator)
+        return tokens
+
     def __bytes__(self):
-        if not self.operands:
-            return str(self.operator).encode()
-        else:
-            code = bytearray()
-            # TODO use bytes
-            for operand in self.operands:
-                if isinstance(operand, Object):
-                    code.extend(operand.unparse())
-                else:
-                    code.extend(str(operand).encode())
-                code.extend(b' ')
-            code.extend(str(self.operator).encode())
-            return bytes(code)
+        return b' '.join(self._tokens())
+
+
+class _SharedOperation(Operation):
+    """
+    An operation without operands, shared between streams. Refuses to be changed, since the change
+    would show up in every stream holding it.
+    """
+    __slots__ = ()
+    def __init__(self, operator:Operator):
+        object.__setattr__(self, 'operator', operator)
+        object.__setattr__(self, 'operands', ())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'Shared {self.operator.value} operations cannot be changed')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'Shared {self.operator.value} operations cannot be changed')
+
+    def __eq__(self, other):
+        # Equal to an ordinary `Operation` with the same operator and no operands
+        if isinstance(other, Operation):
+            return self.operator == other.operator and self.operands == tuple(other.operands)
+        return NotImplemented
+
+
+# Operations without operands are all alike, so calling an operator with none returns one of these
+# rather than building a new operation each time
+_NULLARY = {operator: _SharedOperation(operator) for operator in Operator}
+
 
 class ContentStream:
     """
@@ -183,9 +242,28 @@ class ContentStream:
 
     def operation(self, operator:Union[str,Operator], *operands:Union[Array,Dictionary,Name,String,int,float]):
         # Table 51 (under 8.2) lists possible operations
-        self._operations.append(Operator(operator)(operands))
+        op = _OPERATORS.get(operator)
+        if op is None:
+            # Not an operator; let `Enum` raise the usual error
+            op = Operator(operator)
+        self._operations.append(Operation(op, operands))
         return self
     
+    def extend_operations(self, operations:Iterable[tuple]):
+        """
+        Append several operations at once. Each is given as a tuple of the operator followed by its
+        operands, the same as the arguments to `operation`::
+
+            stream.extend_operations([('BT',), ('Td', x, y), ('Tj', text), ('ET',)])
+        """
+        operators = _OPERATORS
+        self._operations.extend(
+            # `or` only falls through for unknown operators, letting `Enum` raise the usual error
+            Operation(operators.get(operator) or Operator(operator), tuple(operands))
+            for operator, *operands in operations
+        )
+        return self
+
     def extend(self, other:ContentStream):
         self._operations.extend(other._operations)
         return self
@@ -211,8 +289,29 @@ class ContentStream:
         """
         return self._operations.pop()
     
+    def write_to(self, file):
+        """
+        Write the stream to a binary file object, one operation at a time, rather than building the
+        whole stream in memory first. Writes the same bytes as `bytes(stream)`.
+        """
+        write = file.write
+        separator = b''
+        for operation in self._operations:
+            write(separator)
+            write(bytes(operation))
+            separator = b' '
+
     def __bytes__(self):
-        return b' '.join(map(bytes, self._operations))
+        # Join the tokens of every operation at once, rather than joining each operation and then
+        # joining the results again
+        tokens = []
+        for operation in self._operations:
+            if isinstance(operation, Operation):
+                tokens.extend(operation._tokens())
+            else:
+                # Raw code from `append_raw`
+                tokens.append(bytes(operation))
+        return b' '.join(tokens)
     # TODO PdfTokens could be used to split the string when parsing
 
     def set_line_width(self, width):
@@ -320,6 +419,20 @@ class ContentStream:
         self._operations.append(Operator.append_line(x, y))
         return self
     
+    def append_polyline(self, points:Iterable[tuple]):
+        """
+        Begin a new subpath at the first of the given ``(x, y)`` points, then append straight line 
+        segments through each of the others in turn. Equivalent to calling `move` with the first 
+        point and `append_line` with each of the rest.
+        """
+        points = iter(points)
+        for x, y in points:
+            self._operations.append(Operator.move(x, y))
+            break
+        line = Operator.append_line
+        self._operations.extend(Operation(line, (x, y)) for x, y in points)
+        return self
+    
     def append_cubic_bezier(self, x1, y1, x2, y2, x3, y3):
         """
         Append a cubic Bézier curve to the current path. The curve shall extend from the current 
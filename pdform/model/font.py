@@ -1,7 +1,8 @@
 from .base import Wrapper
 from pikepdf import Dictionary, Name
-from enum import IntFlag, Enum
-from typing import Union, List
+from enum import IntFlag
+from typing import Union, List, Tuple
+from functools import cached_property
 
 class FontFlags(IntFlag):
     """
@@ -32,6 +33,11 @@ class Font(Wrapper):
     """
     * 9.6: Simple Fonts
     * 9.8: Font Descriptors
+
+    The metrics read from the font dictionary (`glyph_space_ratio` and the width table) are cached 
+    for as long as the wrapper lives, which is as long as anything holds on to it. Call 
+    `clear_cache` after changing the font's /Subtype, /FirstChar, /Widths, or the widths in its 
+    descriptor.
     """
     raw:Dictionary
 
@@ -39,7 +45,14 @@ class Font(Wrapper):
         self.name = name
         super().__init__()
 
-    @property
+    def clear_cache(self):
+        """
+        Forget the metrics cached from the font dictionary, so they are read again on next use.
+        """
+        self.__dict__.pop('glyph_space_ratio', None)
+        self.__dict__.pop('_width_table', None)
+
+    @cached_property
     def glyph_space_ratio(self):
         """
         The unit ratio when converting between text space coordinates and glyph space coordinates.
@@ -61,6 +74,25 @@ class Font(Wrapper):
     def leading(self, value:Union[int,float]):
         self.raw.FontDescriptor.Leading = value
 
+    @cached_property
+    def _width_table(self)->Tuple[int,List[float],float]:
+        """
+        The code of the first character in /Widths, the widths themselves, and the width to use for
+        characters outside of them. Read from the font once, as measuring a string looks them up 
+        for every character.
+        """
+        descriptor = self.raw.get(Name.FontDescriptor, Dictionary())
+        if Name.MissingWidth in descriptor:
+            missing_width = float(descriptor.MissingWidth)
+        # TODO These remaining fallback I'm not 100% sure are in the right order...or that they should be here at all. Could also use FontBBox
+        elif Name.AvgWidth in descriptor:
+            missing_width = float(descriptor.AvgWidth)
+        elif Name.MaxWidth in descriptor:
+            missing_width = float(descriptor.MaxWidth)
+        else:
+            missing_width = 0
+        return int(self.raw.FirstChar), [float(width) for width in self.raw.Widths], missing_width
+
     def get_char_width(self, char:str, scale=None)->Union[float,int]:
         """
         Get the width of the character.
@@ -71,18 +103,12 @@ class Font(Wrapper):
             this should be the target font size, and the width will be returned relative to this 
             size.
         """
-        char_code = ord(char) - int(self.raw.FirstChar)
-        if len(self.raw.Widths) > char_code:
-            width = float(self.raw.Widths[char_code])
-        elif Name.MissingWidth in self.raw.FontDescriptor:
-            width = float(self.raw.FontDescriptor.MissingWidth)
-        # TODO These remaining fallback I'm not 100% sure are in the right order...or that they should be here at all. Could also use FontBBox
-        elif Name.AvgWidth in self.raw.FontDescriptor:
-            width = float(self.raw.FontDescriptor.AvgWidth)
-        elif Name.MaxWidth in self.raw.FontDescriptor:
-            width = float(self.raw.FontDescriptor.MaxWidth)
+        first_char, widths, missing_width = self._width_table
+        char_code = ord(char) - first_char
+        if 0 <= char_code < len(widths):
+            width = widths[char_code]
         else:
-            width = 0
+            width = missing_width
         if scale is None or scale is False:
             return width
         # Scale based one the nominal height (see 9.2.2)
@@ -106,10 +132,20 @@ class Font(Wrapper):
         :param char_spacing: The optional spacing to add after each non-space character
         :param char_spacing: The optional spacing to add after a space ' ' character
         """
+        # Add up the unscaled widths, then scale and add the spacing once for the whole string, 
+        # rather than going through `get_char_width` for every character
+        first_char, widths, missing_width = self._width_table
+        count = len(widths)
         width = 0
-        for char in string:
-            width += self.get_char_width(char, scale) + (word_spacing if char == ' ' else char_spacing)
-        return width
+        for char_code in map(ord, string):
+            char_code -= first_char
+            width += widths[char_code] if 0 <= char_code < count else missing_width
+        if scale is not None and scale is not False:
+            width = width / self.glyph_space_ratio
+            if scale is not True:
+                width *= scale
+        spaces = string.count(' ')
+        return width + word_spacing * spaces + char_spacing * (len(string) - spaces)
     
     def word_wrap(self, string:str, width, scale=None, char_spacing=0, word_spacing=0)->List[List[str]]:
         """
@@ -138,8 +174,8 @@ class Font(Wrapper):
                 # Don't pass word spacing to `get_string_width`; we've redefined what word spacing 
                 # means above, and there are no spaces in the string anyway
                 word_len = self.get_string_width(word, scale, char_spacing)
-                # Wrap if too long
-                if current_width + word_len > width:
+                # Wrap if too long (unless the line is empty, as the word won't fit on any line)
+                if current_line and current_width + word_len > width:
                     lines.append(' '.join(current_line))
                     current_width = 0
                     current_line = []
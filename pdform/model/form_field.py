@@ -1,8 +1,10 @@
 from warnings import warn
 from pikepdf import Dictionary, String, Name, Array
-from typing import Optional, Union
+from typing import Dict, Optional, Tuple, Union
 from enum import Enum, IntFlag
+from functools import lru_cache
 import re
+from xml.sax.saxutils import escape, quoteattr
 from .base import Wrapper, WrappedProperty
 from .rect import Rect
 from .content_stream import ContentStream
@@ -11,6 +13,25 @@ from .font import Font
 from ..utils.text import layout_text_line, layout_text_multiline
 from ..utils.dictionaries import get_inheritable
 
+# The font and size set by a /DA string's Tf operator, e.g. ``/CourierNewPSMT 10.00 Tf 0 g``
+_DA_TF_RE = re.compile(rb'(/[!-~]+)\s+(\d+(?:\.\d+)?)\s*Tf')
+# Names looked up for every field that is set (Each `Name.X` attribute access constructs a new 
+# Name object, so create these once instead)
+_AS = Name.AS
+_DA = Name.DA
+_FT = Name.FT
+_OFF = Name.Off
+_PARENT = Name.Parent
+_T = Name.T
+_TX = Name.Tx
+_V = Name.V
+# The XFA API version for each PDF version, declared in the rich values of rich text fields
+_XFA_API_VERSIONS = {
+    '1.5': '2.0',
+    '1.6': '2.2',
+    '1.7': '2.4',
+}
+
 
 class InputType(Enum):
     """
@@ -78,7 +99,19 @@ class Field(Wrapper):
     """
     raw:Dictionary
     rect = WrappedProperty(Name.Rect, Rect)
-    field_flags = WrappedProperty(Name.Ff, FieldFlags.lookup, FieldFlags(0), True)
+    _field_flags = WrappedProperty(Name.Ff, FieldFlags.lookup, FieldFlags(0), True)
+
+    @property
+    def field_flags(self) -> FieldFlags:
+        """
+        The field flags, which may be inherited from an ancestor.
+        """
+        return self._field_flags
+    @field_flags.setter
+    def field_flags(self, value:FieldFlags):
+        # pikepdf can't encode an IntFlag, so store it as a plain integer
+        self._field_flags = int(value)
+
     @property
     def qualified_name(self) -> Optional[str]:
         """
@@ -88,19 +121,30 @@ class Field(Wrapper):
         return self.get_qualified_field_name(self.raw)
 
     @classmethod
-    def get_qualified_field_name(cls, field: Dictionary) -> Optional[str]:
+    def get_qualified_field_name(cls, field: Dictionary, cache:Optional[Dict[Tuple[int,int],Optional[str]]]=None) -> Optional[str]:
         """
         Helper function to calculate :py:attr:`qualified_name`.
+
+        :param cache: A dictionary in which to remember the names calculated for the field and its
+            ancestors, keyed by objgen. Passing the same dictionary when naming many fields of the 
+            same PDF means the names of shared ancestors are only built once.
         """
+        if cache is not None:
+            objgen = field.objgen
+            if objgen in cache:
+                return cache[objgen]
         # See 12.7.3.2
-        if "/T" not in field and "/Parent" in field:
-            return cls.get_qualified_field_name(field.Parent)
-        elif "/T" not in field:
-            return None
-        elif "/Parent" in field:
-            return f"{cls.get_qualified_field_name(field.Parent)}.{field.T}"
+        parent = cls.get_qualified_field_name(field.Parent, cache) if _PARENT in field else None
+        if _T not in field:
+            name = parent
+        elif parent is None:
+            name = str(field.T)
         else:
-            return str(field.T)
+            name = f"{parent}.{field.T}"
+        if cache is not None and objgen != (0, 0):
+            # Direct objects have no identity to remember them by
+            cache[objgen] = name
+        return name
     
     @property
     def input_type(self) -> Optional[InputType]:
@@ -108,7 +152,7 @@ class Field(Wrapper):
         Get the type of input this field represents
         """
         flags = self.field_flags
-        field_type = get_inheritable(self.raw, Name.FT)
+        field_type = get_inheritable(self.raw, _FT)
         if field_type == '/Sig':
             return InputType.signature
         elif field_type == '/Btn':
@@ -124,7 +168,7 @@ class Field(Wrapper):
             else:
                 return InputType.select
         elif field_type == '/Tx':
-            if FieldFlags.Pushbutton in flags:
+            if FieldFlags.Password in flags:
                 return InputType.password
             elif FieldFlags.Multiline in flags:
                 return InputType.textarea
@@ -174,16 +218,18 @@ class Field(Wrapper):
         input_type = self.input_type
         if input_type is InputType.radio:
             group = self.raw
-            states = set()
+            # A dict rather than a set, so the order of the states doesn't change from run to run
+            # (Iterating /N directly gives its keys in a fixed order; `keys()` returns a set)
+            states = {}
             if self.raw.Kids is None:
                 group = Field(self.raw.Parent)
                 if group.input_type is not InputType.radio:
                     raise RuntimeError(f'Field {self.qualified_name} is a radio button not part of any group, or is a radio group with no buttons')
             for kid in group.Kids:
-                states.update(kid.AP.N.keys())
+                states.update(dict.fromkeys(kid.AP.N))
             return list(states)
         elif input_type is InputType.checkbox:
-            return list(self.raw.AP.N.keys())
+            return list(self.raw.AP.N)
         elif input_type is InputType.select or input_type is InputType.combo:
             return list((str(opt[0]), str(opt[1])) if isinstance(opt, Array) else opt for opt in self.raw.Opt)
 
@@ -193,13 +239,28 @@ class Field(Wrapper):
         The value of this field. When setting, appearance streams and other associated properties 
         will also be set.
         """
-        return get_inheritable(self.raw, Name.V)
+        return get_inheritable(self.raw, _V)
     @value.setter
     def value(self, value):
+        self.set_value(value)
+
+    def set_value(self, value, font_dict:Optional[Dictionary]=None, input_type:Optional[InputType]=None, font_cache:Optional[Dict[Tuple[int,int],Font]]=None):
+        """
+        Set the value of this field, same as assigning to `value`.
+
+        :param value: The value to set
+        :param font_dict: The /Font dictionary of ``pdf.Root.AcroForm.DR``, if already looked up.
+            Callers setting many fields can pass it to save looking it up again for each one.
+        :param input_type: The field's `input_type`, if already looked up (e.g. by 
+            `pdform.tools.form.index_fields`). Looked up if not given.
+        :param font_cache: A dictionary in which to remember the fonts used, by the objgen of their
+            font dictionary. See `layout_form_text`.
+        """
         # Useful link: https://westhealth.github.io/exploring-fillable-forms-with-pdfrw.html
         # Note: The above link incorrectly conflates listbox/combobox with uniselect/multiselect
         # Actually, listbox = dropdown select, combobox = text input with dropdown suggestions
-        input_type = self.input_type
+        if input_type is None:
+            input_type = self.input_type
         if input_type is InputType.radio:
             self._set_value_radiogroup(value)
         elif input_type is InputType.checkbox:
@@ -209,10 +270,10 @@ class Field(Wrapper):
             warn('Signature fields are not supported; skipping')
             return
         elif input_type is InputType.select or input_type is InputType.combo:
-            self._set_value_choice(value)
+            self._set_value_choice(value, font_dict, font_cache)
         else:
             # Assume text field
-            self._set_value_text(value)
+            self._set_value_text(value, font_dict, font_cache)
 
     def _set_value_radiogroup(self, value):
         if not isinstance(value, Name):
@@ -221,44 +282,49 @@ class Field(Wrapper):
                 value = f"/{value}"
             value = Name(value)
         group = self.raw
-        off = Name.Off
+        off = _OFF
         if self.raw.Kids is None:
             group = Field(self.raw.Parent)
             if group.input_type is not InputType.radio:
                 raise RuntimeError(f'Field {self.qualified_name} is a radio button not part of any group, or is a radio group with no buttons')
         for kid in group.Kids:
             # Set appearance streams for children (individual radio buttons)
-            states = set(kid.AP.N.keys())
-            states.discard(off)
-            if value in states:
+            if value != off and value in kid.AP.N:
                 kid.AS=value
-            elif '/AS' in kid:
+            elif _AS in kid:
                 kid.AS=off
         # Set value for parent (radio group)
         group.V=value
 
     def _set_value_checkbox(self, value):
-        off = Name.Off
-        states = set(self.raw.AP.N.keys())
-        if isinstance(value, (str,bytes,Name)) and value in states:
+        off = _OFF
+        # Check the appearance states on the dictionary itself; `keys()` would build a new set
+        states = self.raw.AP.N
+        if isinstance(value, bytes):
+            value = value.decode()
+        if isinstance(value, str) and value[:1] != '/':
+            # As for radio buttons, the state may be given without its leading slash
+            value = f"/{value}"
+        if isinstance(value, (str,Name)) and value in states:
             if not isinstance(value, Name):
                 value = Name(value)
-            self.raw.V = value
-            self.raw.AS = value
-            return
-        states.discard(off)
-        on = Name(states.pop())
-        # Set/Delete both value and appearance stream
-        if value is True:
-            self.raw.V=on
-            self.raw.AS=on
+        elif value is True:
+            # The "on" state is whichever one isn't /Off
+            value = next((Name(state) for state in states if state != off), None)
+            if value is None:
+                raise RuntimeError(f'Field {self.qualified_name} is a checkbox with no "on" appearance state')
         elif value is False or value is None:
-            self.raw.V=off
-            self.raw.AS=off
+            value = off
         else:
             raise ValueError(f'Invalid checkbox value: {repr(value)}')
+        # Leave the field alone if it is already in this state (A missing /V or /AS means off)
+        if (self.value or off) == value and self.raw.get(_AS, off) == value:
+            return
+        # Set both value and appearance stream
+        self.raw.V = value
+        self.raw.AS = value
     
-    def _set_value_text(self, value):
+    def _set_value_text(self, value, font_dict:Optional[Dictionary]=None, font_cache:Optional[Dict[Tuple[int,int],Font]]=None):
         if isinstance(value, String):
             self.raw.V=value
             value = str(value)
@@ -270,14 +336,15 @@ class Field(Wrapper):
         # let the reader figure this out for us, but in practice not all readers will...)
         #
         # First get the default appearance, either from the parent chain or the root AcroForm
-        da = get_inheritable(self.raw, Name.DA)
+        da = get_inheritable(self.raw, _DA)
         if da is None:
-            da = self.pdf.Root.AcroForm.get('/DA')
+            da = self.pdf.Root.AcroForm.get(_DA)
         # All spec-compliant PDFs should have DA in one of those two places, so fail if not
         if da is None:
             raise RuntimeError(f'Corrupted or Invalid PDF: Field {self.qualified_name} has no /DA')
         # Now build the appearance stream for the entered text
-        xobject = layout_form_text(self.pdf, value, da, self.rect, multiline=FieldFlags.Multiline in self.field_flags)
+        flags = self.field_flags
+        xobject = layout_form_text(self.pdf, value, da, self.rect, multiline=FieldFlags.Multiline in flags, font_dict=font_dict, font_cache=font_cache)
         if '/AP' not in self.raw:
             self.raw.AP = Dictionary(N = xobject.raw)
         else:
@@ -286,38 +353,35 @@ class Field(Wrapper):
         # markup and are placed in /RV, see 12.7.3.4
         # (We don't actually support the input of rich text right now, just the output)
         # FIXME: This doesn't actually seem to make any visible difference whatsoever
-        if FieldFlags.RichText in self.field_flags:
-            ds = str(self.raw.DS).replace('"', '\\"')
-            xfa_api = {
-                '1.5': '2.0',
-                '1.6': '2.2',
-                '1.7': '2.4'
-            }.get(self.pdf.pdf_version, '2.4')
-            rich_value = (
+        if FieldFlags.RichText in flags:
+            # The text and style go into XHTML, so escape them (The style becomes an attribute)
+            style = f'<p style={quoteattr(str(self.raw.DS))}>'
+            xfa_api = _XFA_API_VERSIONS.get(self.pdf.pdf_version, '2.4')
+            rich_value = ''.join((
                 '<?xml version="1.0"?>'
                 '<body xmlns="http://www.w3.org/1999/xhtml" '
                 'xmlns:xfa="http://www.xfa.org/schema/xfa-data/1.0/" '
                 'xfa:APIVersion="pdform:0.1.0" ' # Adobe uses "Acroform:2.7.0.0"
                 f'xfa:spec="{xfa_api}" '
-                '>'
-                f'<p style="{ds}">'+
-                f'</p><p style="{ds}">'.join(value.splitlines())+
+                '>',
+                style,
+                f'</p>{style}'.join(map(escape, value.splitlines())),
                 '</p>'
-                '</body>'
-            )
+                '</body>',
+            ))
             self.raw.RV = String(rich_value)
     
 
-    def _set_value_choice(self, value):
+    def _set_value_choice(self, value, font_dict:Optional[Dictionary]=None, font_cache:Optional[Dict[Tuple[int,int],Font]]=None):
         if FieldFlags.MultiSelect in self.field_flags:
             raise NotImplementedError('Multiselect not yet supported')
             # TODO we should just have to set V to an array, but I'm not sure what to do for appearance
         self.field_flags |= FieldFlags.Combo # Hacky workaround since we aren't validating options right now
-        self._set_value_text(value)
+        self._set_value_text(value, font_dict, font_cache)
 
 
 
-def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0, multiline=False, line_spacing=None):
+def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0, multiline=False, line_spacing=None, font_dict:Optional[Dictionary]=None, font_cache:Optional[Dict[Tuple[int,int],Font]]=None):
     """
     Lay out the given text in the given bounding box, returning a form XObject
 
@@ -325,24 +389,38 @@ def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0
     :param text: The text to layout in the field
     :param da: The /DA attribute of the field
     :param rect: The /Rect attribute of the field
+    :param font_dict: The /Font dictionary of ``pdf.Root.AcroForm.DR``. Looked up if not given.
+    :param font_cache: A dictionary in which to remember the `Font` of each font dictionary, by 
+        objgen. Passing the same dictionary when laying out many fields of the same PDF means each
+        font's metrics (e.g. its width table) are only read once. As the fonts' metrics are cached
+        on them, the dictionary should not outlive any changes made to the fonts themselves.
     """
     if isinstance(da, String):
         da = bytes(da)
     # Extract font information from DA
     # The DA will be something like this, defining font and scale factor for the text object:
     # /CourierNewPSMT 10.00 Tf 0 g
-    match = re.search(b'(\/[!-~]+)\s+(\d+(?:\.\d+))\s*Tf', da)
-    if not match:
+    parsed = _parse_da_font(da)
+    if parsed is None:
         raise ValueError(f'Invalid or missing /DA (contains no valid Tf operator): {repr(da)}')
-    font_family = Name(match[1].decode())
-    font_size = float(match[2])
+    font_family, font_size = parsed
+    if font_size == 0:
+        # A size of 0 means auto-sized text (See 12.7.3.3), which would otherwise be drawn at size 0
+        raise NotImplementedError(f'Auto-sized text (a /DA font size of 0) is not yet supported: {repr(da)}')
     # Lookup the font info in the main font dict 
     # TODO technically this data could also be stored in field.inheritable.DR
-    font_dict = pdf.Root.AcroForm.DR.Font
+    if font_dict is None:
+        font_dict = pdf.Root.AcroForm.DR.Font
     if font_family not in font_dict:
         raise RuntimeError(f'Cannot find font information for {font_family} (Available fonts: {", ".join(font_dict.keys())})')
     font_data = font_dict[font_family]
-    font = Font(pdf, font_data, font_family)
+    objgen = font_data.objgen
+    font = None if font_cache is None else font_cache.get(objgen)
+    if font is None:
+        font = Font(pdf, font_data, font_family)
+        if font_cache is not None and objgen != (0, 0):
+            # Direct objects have no identity to remember them by
+            font_cache[objgen] = font
     # See 12.5.5 and in 8.10
     # Form Dictionary (Described in table 95)
     bbox = rect.to_bbox()
@@ -351,8 +429,13 @@ def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0
     resources = Dictionary(Font = fdict)
     # Convert the DA to new text stream (see 12.7.3.3)
     stream = (ContentStream()
-        .begin_marked_content(Name.Tx) # (I guess this makes text more extractable)
+        .begin_marked_content(_TX) # (I guess this makes text more extractable)
         .push_stack()
+        # Clip to the field before the text object starts, as path operators aren't allowed inside
+        # one (See 8.2). The clip only lasts until the matching `pop_stack`.
+        .append_rectangle(0, 0, bbox.width, bbox.height)
+        .clip()
+        .end_path()
         .begin_text()
         .append_raw(da) # Include the default appearance
         # TODO this is very naive and could probably be significantly improved
@@ -367,12 +450,12 @@ def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0
         .extend(
             layout_text_multiline(
                 pdf, text, bbox, font, font_size, 
-                include_set_font=False, padding=padding, leading=line_spacing
+                include_set_font=False, include_clip_rect=False, padding=padding, leading=line_spacing
             )
             if multiline else 
             layout_text_line(
                 pdf, text, bbox, font, font_size, 
-                include_set_font=False, padding=padding
+                include_set_font=False, include_clip_rect=False, padding=padding
             )
         )
         .end_text()
@@ -381,3 +464,15 @@ def layout_form_text(pdf, text:str, da:Union[String,bytes], rect:Rect, padding=0
     )
     # Set the stream on the form XObject
     return FormXObject.new(pdf, bbox, stream, resources)
+
+
+@lru_cache(maxsize=64)
+def _parse_da_font(da:bytes)->Optional[Tuple[Name,float]]:
+    """
+    Get the font name and size set by the Tf operator in a /DA string, or None if it has none. 
+    Cached, since the fields of a form tend to share a handful of /DA strings.
+    """
+    match = _DA_TF_RE.search(da)
+    if not match:
+        return None
+    return Name(match[1].decode()), float(match[2])
@@ -41,4 +41,5 @@ class Rect(Wrapper):
 
         Bounding boxes represent independent coordinate systems, such as for form XObjects.
         """
-        return Rect.new(self.pdf, 0, 0, self.width, self.height)
\ No newline at end of file
+        left, bottom, right, top = map(float, self.raw)
+        return Rect.new(self.pdf, 0, 0, right - left, top - bottom)
\ No newline at end of file
@@ -1,2 +1,2 @@
-from .form import iter_fields, fill_form
-from .stamp import stamp
\ No newline at end of file
+from .form import iter_fields, index_fields, fill_form
+from .stamp import stamp, stamp_page
\ No newline at end of file
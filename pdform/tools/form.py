@@ -1,9 +1,15 @@
-from pikepdf import Dictionary, Name
-from typing import Sequence
+from pikepdf import Dictionary, Name, Page
+from typing import Dict, List, Sequence, Tuple
 from ..model.form_field import Field, InputType
 from ..model.rect import Rect
-from .stamp import stamp
-from ..utils.dictionaries import get_inheritable
+from .stamp import stamp_page
+
+# The names looked up for every node while walking the field tree. Each `Name.X` attribute access
+# constructs a new Name object, so create these once instead.
+_ANNOTS = Name.Annots
+_KIDS = Name.Kids
+_SUBTYPE = Name.Subtype
+_WIDGET = Name.Widget
 
 def iter_fields(pdf, annots:Sequence[Dictionary]):
     """
@@ -15,31 +21,75 @@ def iter_fields(pdf, annots:Sequence[Dictionary]):
         * ``page.Annots``
         * ``field.Kids``
     """
+    for field, _ in _iter_field_wrappers(pdf, annots):
+        yield field.raw
+
+
+def _iter_field_wrappers(pdf, annots:Sequence[Dictionary]):
+    """
+    Implementation of `iter_fields`, yielding the `Field` wrapper of each field rather than its raw
+    dictionary, along with its `Field.input_type` (which has to be looked up for every widget 
+    anyway).
+    """
     radios = set()
-    for annot in annots:
-        if Name.Subtype not in annot or annot.Subtype != Name.Widget:
+    # Walk the tree with an explicit stack rather than recursing into each group. Kids are pushed 
+    # in reverse, so they still come out in document order.
+    stack = list(reversed(annots))
+    while stack:
+        annot = stack.pop()
+        if _SUBTYPE not in annot or annot.Subtype != _WIDGET:
             # Not a widget. We'll still iterate Kids just in case any of them are.
-            if Name.Kids in annot:
-                yield from iter_fields(pdf, annot.Kids)
+            if _KIDS in annot:
+                stack.extend(reversed(annot.Kids))
             continue
         field = Field(pdf, annot)
         input_type = field.input_type
         if input_type is InputType.radio:
-            if Name.Kids in annot:
+            if _KIDS in annot:
                 # Radio group
-                yield annot
+                yield field, input_type
             else:
                 # Single radio button, only yield the parent
-                if field.qualified_name in radios:
+                parent = annot.Parent
+                if parent.objgen in radios:
                     continue # We already did this one
-                yield annot.Parent
-                radios.add(field.qualified_name)
-        elif Name.Kids in annot:
+                yield Field(pdf, parent), input_type
+                radios.add(parent.objgen)
+        elif _KIDS in annot:
             # All other groups, yield the leaf nodes
-            yield from iter_fields(pdf, annot.Kids)
+            stack.extend(reversed(annot.Kids))
         else:
             # Leaf node
-            yield annot
+            yield field, input_type
+
+
+def index_fields(pdf)->Dict[str, List[Tuple[Page, Field, InputType]]]:
+    """
+    Build an index of the form fields in the PDF, keyed by ``field.qualified_name``, using a single
+    pass over the annotations of each page.
+
+    Each value is a list of ``(page, field, input_type)`` tuples, as a field may have several 
+    widgets, possibly spread across several pages. As with `iter_fields`, radio buttons are 
+    represented by their parent. The input type is the field's `Field.input_type` at the time of 
+    indexing, so it needn't be worked out from the field's flags again.
+
+    PDFs without an AcroForm have no fields, so their pages are not traversed at all.
+    """
+    index = {}
+    # Qualified names of the fields seen so far, by objgen, so that the names of shared ancestors
+    # (e.g. ``form1[0].page1[0]``) are only built once rather than once per descendant
+    names = {}
+    if Name.AcroForm not in pdf.Root or not pdf.Root.AcroForm.get(Name.Fields):
+        # Not a form; don't bother loading every page's annotations
+        return index
+    for page in pdf.pages:
+        if _ANNOTS not in page:
+            continue
+        for field, input_type in _iter_field_wrappers(pdf, page[_ANNOTS]):
+            key = Field.get_qualified_field_name(field.raw, names)
+            if key:
+                index.setdefault(key, []).append((page, field, input_type))
+    return index
 
 
 def fill_form(pdf, data:dict):
@@ -56,26 +106,45 @@ def fill_form(pdf, data:dict):
         * For signature fields, provide the path to an image which will be stamped in its place (real
           cryptographic signatures are not supported)
     """
-    for page in pdf.pages:
-        if Name.Annots not in page:
+    # Resolve every field once up front, so finding its value is just a lookup in `data`
+    index = index_fields(pdf)
+    # The objgens of the sig field widgets to remove from each page's /Annots, keyed by page objgen
+    to_delete = {}
+    # Stamps are collected per page, so each page's content stream is only rewritten once
+    stamps = {}
+    # Text fields all take their fonts from the same dict, so only look it up once
+    font_dict = None
+    resources = pdf.Root.AcroForm.get(Name.DR) if index else None
+    if resources is not None:
+        font_dict = resources.get(Name.Font)
+    # Hold on to the fonts for the whole fill, so each font's width table is built once rather 
+    # than once per field (Nothing else keeps the `Font` wrappers alive between fields)
+    fonts = {}
+    # Walk the fields in document order (the order of the index) rather than the order of `data`, 
+    # so each page's annotations are all filled together
+    for key, widgets in index.items():
+        value = data.get(key)
+        if value is None:
             continue
-        annotations = page[Name.Annots]
-        to_delete = []
-        for index, annotation in enumerate(iter_fields(pdf, annotations)):
-            field = Field(pdf, annotation)
-            key = field.qualified_name
-            if key and key in data and data[key] is not None:
-                if get_inheritable(annotation, Name.FT) == Name.Sig:
-                    # Replace sig fields with stamps
-                    stamp(data[key], page, Rect(pdf, annotation.Rect))
-                    to_delete.append(index)
-                else:
-                    field.value = data[key]
-        for index in reversed(to_delete):
-            del page.Annots[index]
+        for page, field, input_type in widgets:
+            if input_type is InputType.signature:
+                # Replace sig fields with stamps
+                stamps.setdefault(page.obj.objgen, (page, []))[1].append((value, field.rect))
+                to_delete.setdefault(page.obj.objgen, (page, set()))[1].add(field.raw.objgen)
+            else:
+                field.set_value(value, font_dict, input_type, fonts)
+    for page, objgens in to_delete.values():
+        # Rebuild each page's annotations once, rather than searching them for every deletion
+        annots = page[_ANNOTS]
+        annots[:] = [annot for annot in annots if annot.objgen not in objgens]
     if '.stamps' in data:
         # Custom stamps not associated with fields
         for stamp_data in data['.stamps']:
             if not stamp_data['img']:
                 continue
-            stamp(stamp_data['img'], pdf.pages[stamp_data['page']-1], Rect.new(pdf, *stamp_data['rect']))
+            page = pdf.pages[stamp_data['page']-1]
+            stamps.setdefault(page.obj.objgen, (page, []))[1].append((stamp_data['img'], Rect.new(pdf, *stamp_data['rect'])))
+    # Shared between pages, so that an image used several times is only embedded once
+    images = {}
+    for page, page_stamps in stamps.values():
+        stamp_page(page, page_stamps, pdf=pdf, cache=images)
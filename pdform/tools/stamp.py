@@ -1,36 +1,340 @@
 from ..model.rect import Rect
-from typing import Optional
+from ..model.content_stream import format_number
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
 from io import BytesIO
-from PIL import Image
-from pikepdf import Pdf, Page
+from hashlib import sha1
+import zlib
+import os
+from os import PathLike
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from pikepdf import Array, Pdf, Page, Name, Object, Stream
+# PIL is only imported once an image is actually stamped, so that importing pdform (e.g. for the 
+# ``inspect-form`` command) doesn't pay for it
+if TYPE_CHECKING:
+    from PIL import Image
 
+# The lowest value of each color component for a pixel to count as white, for 
+# `transparent_background`. Below 255 so that the background of a JPEG, which compression leaves 
+# speckled with values just short of white, is removed too.
+_WHITE_THRESHOLD = 240
+# JPEG color modes that can be embedded unchanged, mapped to their PDF color space (See 8.6.4)
+_JPEG_COLOR_SPACES = {
+    'L': Name.DeviceGray,
+    'RGB': Name.DeviceRGB,
+}
 
-def stamp(img, page:Page, rect:Rect, transparent_background:Optional[bool]=None):
+
+def stamp(img, page:Page, rect:Rect, transparent_background:Optional[bool]=None, pdf:Optional[Pdf]=None):
     """
     Stamp an image on the page, fitting it in the box of the given rect.
 
     :param img: The image to stamp. Can be a file path, open file object, or base64 data URL.
     :param page: The page to stamp the image on.
     :param rect: The box in which to place the image. The image will be scaled to fit.
-    :param transparent_background: If True, all white pixels will be made transparent.
+    :param transparent_background: If True, all white pixels will be made transparent. Pixels with
+        every color component at 240 or above count as white, to allow for JPEG compression noise.
+    :param pdf: The PDF that the page belongs to. If provided, JPEG images will be embedded 
+        directly, rather than being decoded and re-encoded.
+    """
+    stamp_page(page, [(img, rect)], transparent_background, pdf)
+
+
+def stamp_page(page:Page, stamps:Iterable[Tuple[object,Rect]], transparent_background:Optional[bool]=None, pdf:Optional[Pdf]=None, cache:Optional[Dict[str,Object]]=None):
+    """
+    Stamp several images on the same page. This is equivalent to calling `stamp` for each image,
+    except that the page's content stream is only rewritten once, rather than once per image.
+
+    :param page: The page to stamp the images on.
+    :param stamps: The ``(img, rect)`` pairs to stamp, with the same meaning as the corresponding
+        parameters of `stamp`.
+    :param transparent_background: If True, all white pixels will be made transparent. Pixels with
+        every color component at 240 or above count as white, to allow for JPEG compression noise.
+    :param pdf: The PDF that the page belongs to. If provided, JPEG images will be embedded 
+        directly, rather than being decoded and re-encoded.
+    :param cache: A dictionary in which to keep the XObjects created for each image, keyed by a 
+        hash of the image file. Passing the same dictionary to several calls for pages of the same
+        PDF embeds each distinct image only once. Must not be shared between PDFs.
+    """
+    placements = []
+    for img, rect in stamps:
+        key = None if cache is None else _image_key(img, transparent_background)
+        xobject = None if key is None else cache.get(key)
+        if xobject is None:
+            xobject = _image_as_xobject(page, img, transparent_background, pdf)
+            if key is not None:
+                cache[key] = xobject
+        name = page.add_resource(xobject, Name.XObject)
+        if xobject.Subtype == Name.Image:
+            placements.append(_place_image(name, int(xobject.Width), int(xobject.Height), rect))
+        else:
+            placements.append(page.calc_form_xobject_placement(xobject, name, rect.helper))
+    if not placements:
+        return
+    # Same as `page.add_overlay`, but only coalescing the content stream once for all the images
+    page.contents_add(b'q\n', prepend=True)
+    page.contents_add(b'Q\n' + b''.join(placements), prepend=False)
+    page.contents_coalesce()
+
+
+def _image_as_xobject(page:Page, img, transparent_background:Optional[bool]=None, pdf:Optional[Pdf]=None)->Object:
+    """
+    Create an XObject for the image, owned by the same PDF as the page.
+    """
+    if pdf is not None:
+        jpeg = _read_jpeg(img)
+        if jpeg is not None:
+            # JPEGs can be embedded as-is, without decoding and re-encoding them
+            data, width, height, color_space = jpeg
+            image_filter = Name.DCTDecode
+        else:
+            # Other formats are decoded and their pixels embedded directly, rather than having PIL
+            # write a whole PDF for us to parse again
+            data, width, height, color_space = _image_as_pixels(img)
+            image_filter = Name.FlateDecode
+        image = Stream(pdf, data,
+            Type = Name.XObject,
+            Subtype = Name.Image,
+            Width = width,
+            Height = height,
+            ColorSpace = color_space,
+            BitsPerComponent = 8,
+            Filter = image_filter,
+        )
+        if transparent_background:
+            # Color key masking: pixels with every component in the given ranges aren't painted, 
+            # so a range from the threshold to 255 for each component leaves white see-through 
+            # (See 8.9.6.4)
+            components = 1 if color_space == Name.DeviceGray else 3
+            image.Mask = Array([_WHITE_THRESHOLD, 255] * components)
+        return pdf.make_indirect(image)
+    # Use the PDF version of the image, copied into the page's PDF (but not added to its resources;
+    # `stamp_page` does that)
+    stamp_pdf = _image_as_pdf(img, transparent_background)
+    return stamp_pdf.pages[0].as_form_xobject().with_same_owner_as(page.obj)
+
+
+def _image_key(img, transparent_background:Optional[bool]=None)->str:
+    """
+    Get the SHA-1 digest identifying the image's content, for use as a key in the `stamp_page` 
+    cache.
+    """
+    if not isinstance(img, (str, PathLike)):
+        # An open file object; hash its contents, then put it back where it was
+        start = img.tell()
+        digest = sha1(img.read()).hexdigest()
+        img.seek(start)
+    elif str(img).startswith('data:'):
+        digest = sha1(str(img).encode()).hexdigest()
+    else:
+        digest = _hash_file(*_file_version(img))
+    return f"{'transparent' if transparent_background else 'opaque'}:{digest}"
+
+
+class _FileCache:
+    """
+    A least-recently-used cache of the data read or converted from image files, for the functions 
+    it decorates. Each is called with the `_file_version` of a file (plus any other arguments), and
+    returns image data, or a tuple starting with it, or None.
+
+    Bounded by the total size of the image data held rather than by the number of entries, so that
+    a few large images can't keep a long-running process's memory pinned. Anything larger than the 
+    whole budget isn't kept at all.
+    """
+    def __init__(self, max_bytes:int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __call__(self, function):
+        entries = self._entries
+        @wraps(function)
+        def cached(*args):
+            key = (function, *args)
+            if key in entries:
+                entries.move_to_end(key)
+                return entries[key][0]
+            result = function(*args)
+            size = 0 if result is None else len(result[0] if isinstance(result, tuple) else result)
+            if size <= self.max_bytes:
+                entries[key] = (result, size)
+                self._size += size
+                while self._size > self.max_bytes:
+                    _, (_, evicted) = entries.popitem(last=False)
+                    self._size -= evicted
+            return result
+        return cached
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+
+# Shared by all the per-file caches below
+_file_cache = _FileCache(16 << 20)
+
+
+def _file_version(path)->Tuple[str,int]:
+    """
+    Identify the current version of a file, as the key for the per-file caches below. Including the
+    modification time means that a file which changes is read again, rather than served stale.
+    """
+    path = os.path.abspath(path)
+    return path, os.stat(path).st_mtime_ns
+
+
+@lru_cache(maxsize=64)
+def _hash_file(path:str, mtime_ns:int)->str:
+    digest = sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_jpeg(img)->Optional[Tuple[bytes,int,int,Name]]:
+    """
+    If the image is a JPEG file which can be embedded in the PDF unchanged, return its raw data, 
+    width, height, and color space. Otherwise, return None.
+    """
+    if not isinstance(img, (str, PathLike)):
+        # An open file object; these can't be cached, so just check it directly
+        return _sniff_jpeg(img)
+    if str(img).startswith('data:'):
+        return None
+    return _load_jpeg(*_file_version(img))
+
+
+@_file_cache
+def _load_jpeg(path:str, mtime_ns:int)->Optional[Tuple[bytes,int,int,Name]]:
+    with open(path, 'rb') as file:
+        return _sniff_jpeg(file)
+
+
+def _sniff_jpeg(file)->Optional[Tuple[bytes,int,int,Name]]:
+    """
+    Implementation of `_read_jpeg` for an open file. If it isn't a usable JPEG, the file is left at
+    the position it started at, ready to be read again by `_image_as_pixels` (and so `_compress_image`).
+    """
+    from PIL import Image
+    start = file.tell()
+    # PIL only reads the header here; the image itself is never decoded
+    with Image.open(file) as image:
+        jpeg = image.format == 'JPEG' and image.mode in _JPEG_COLOR_SPACES
+        if jpeg:
+            width, height = image.size
+            color_space = _JPEG_COLOR_SPACES[image.mode]
+    file.seek(start)
+    if not jpeg:
+        return None
+    return file.read(), width, height, color_space
+
+
+def _place_image(name:Name, width:int, height:int, rect:Rect)->bytes:
+    """
+    Build the content stream to paint an image XObject, scaled to fit and centered in the rect.
+
+    The image is sized as if it were 72 DPI, the same as the PDFs generated by `_image_as_pdf`.
+    """
+    left, bottom, right, top = map(float, rect.raw)
+    box_width = right - left
+    box_height = top - bottom
+    # Image XObjects are painted in the unit square, so scale by the image size (See 8.9.4)
+    scale = min(box_width / width, box_height / height)
+    width *= scale
+    height *= scale
+    # A handful of operations with a fixed layout, so format them directly rather than creating a 
+    # `ContentStream` of `Operation` objects to serialize
+    x = left + (box_width - width) / 2
+    y = bottom + (box_height - height) / 2
+    return b' '.join((
+        b'q', format_number(width), b'0 0', format_number(height), format_number(x), format_number(y), 
+        b'cm', name.unparse(), b'Do Q\n'
+    ))
+
+
+def _image_as_pixels(img)->Tuple[bytes,int,int,Name]:
+    """
+    Decode the image, returning its Flate-compressed pixel data, width, height, and color space.
+    """
+    if isinstance(img, (str, PathLike)) and not str(img).startswith('data:'):
+        # Image files are only decoded again if they change
+        return _compress_image_file(*_file_version(img))
+    # File objects and data URLs are only reused through the `stamp_page` cache, so their data
+    # isn't kept once the call is over
+    return _compress_image(img)
+
+
+@_file_cache
+def _compress_image_file(path:str, mtime_ns:int)->Tuple[bytes,int,int,Name]:
+    return _compress_image(path)
+
+
+def _compress_image(img)->Tuple[bytes,int,int,Name]:
+    """
+    Implementation of `_image_as_pixels`.
+    """
+    img = _open_image(img)
+    if img.mode == 'L':
+        color_space = Name.DeviceGray
+    else:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        color_space = Name.DeviceRGB
+    width, height = img.size
+    # Image XObjects hold samples row by row, same as PIL's raw encoding (See 8.9.5)
+    return zlib.compress(img.tobytes()), width, height, color_space
+
+
+def _image_as_pdf(img, transparent_background:Optional[bool]=None)->Pdf:
+    """
+    Convert the image to a single-page PDF, for use by `stamp_page`.
+    """
+    if isinstance(img, (str, PathLike)) and not str(img).startswith('data:'):
+        # Image files are only converted again if they change
+        return Pdf.open(BytesIO(_convert_image_file(*_file_version(img), bool(transparent_background))))
+    # File objects and data URLs are only reused through the `stamp_page` cache, so their data
+    # isn't kept once the call is over
+    return Pdf.open(BytesIO(_convert_image(img, transparent_background)))
+
+
+@_file_cache
+def _convert_image_file(path:str, mtime_ns:int, transparent_background:bool)->bytes:
+    return _convert_image(path, transparent_background)
+
+
+def _convert_image(img, transparent_background:Optional[bool]=None)->bytes:
+    """
+    Convert the image to the bytes of a single-page PDF.
     """
-    if isinstance(img, str) and img.startswith('data:'):
-        # embedded base64
-        from base64 import b64decode
-        _, path = path.split(',', 2)
-        path = BytesIO(b64decode(path))
     # Open image and convert to RGB (Greyscale images cause issues)
-    img = Image.open(img).convert('RGB')
+    img = _open_image(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
     # Remove a transparent background (as a solid color)
     if transparent_background:
-        # FIXME
-        mask = img.convert('L')
-        img.putalpha(mask)
+        from PIL import ImageChops
+        # The darkest component is only white where all three are, so make just those transparent
+        red, green, blue = img.split()
+        darkest = ImageChops.darker(ImageChops.darker(red, green), blue)
+        img.putalpha(darkest.point(lambda value: 0 if value >= _WHITE_THRESHOLD else 255))
     # Convert the image to a PDF
     img_as_pdf = BytesIO()
     img.save(img_as_pdf, 'pdf')
     del img
-    img_as_pdf.seek(0)
-    # Overlay the PDF version of the image over the page
-    stamp_pdf = Pdf.open(img_as_pdf)
-    page.add_overlay(stamp_pdf.pages[0], rect.helper)
+    return img_as_pdf.getvalue()
+
+
+def _open_image(img)->'Image.Image':
+    """
+    Open the image with PIL. Accepts the same values as the ``img`` parameter of `stamp`.
+    """
+    from PIL import Image
+    if isinstance(img, str) and img.startswith('data:'):
+        # embedded base64
+        from base64 import b64decode
+        header, _, payload = img.partition(',')
+        if not header.endswith(';base64'):
+            raise ValueError(f'Only base64 data URLs are supported for images, got {header!r}')
+        img = BytesIO(b64decode(payload))
+    return Image.open(img)
@@ -1,12 +1,13 @@
 from pikepdf import Dictionary, Name
 
+_PARENT = Name.Parent
+
 def get_inheritable(dic:Dictionary, name:Name):
     """
     Look up an inheritable property through the chain of inheritance
     """
-    if name in dic:
-        return dic[name]
-    elif Name.Parent in dic:
-        return get_inheritable(dic.Parent, name)
-    else:
-        return None
\ No newline at end of file
+    while name not in dic:
+        if _PARENT not in dic:
+            return None
+        dic = dic[_PARENT]
+    return dic[name]
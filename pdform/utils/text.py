@@ -16,7 +16,8 @@ def layout_text_line(pdf, text, rect:Rect, font:Font, font_scale=1, include_set_
     :param rect: The area in which to render the text
     :param font: The font in which the text will be rendered
     :param include_clip_rect: If True, a `clip` operation will be included in the output stream, 
-        clipping to the bounds of `rect`
+        clipping to the bounds of `rect`. Path operators aren't allowed inside a text object, so if
+        the stream is going in one, leave this off and clip before the text object instead.
     :param include_set_font: If True, a `set_font` operation will be included in the output stream
     :param include_set_spacing: If True, a `set_word_spacing` operation and `set_character_spacing` 
         will be included in the output stream, if the corresponding parameters are not 0.
@@ -31,10 +32,13 @@ def layout_text_line(pdf, text, rect:Rect, font:Font, font_scale=1, include_set_
         pad_x, pad_y = padding
     else:
         pad_x = pad_y = padding
+    left, bottom, right, top = map(float, rect.raw)
     stream = ContentStream()
     if include_clip_rect:
-        stream.append_rectangle(rect.left, rect.bottom, rect.width, rect.height)
+        stream.append_rectangle(left, bottom, right - left, top - bottom)
         stream.clip()
+        # A clip only takes effect at the end of the path (See 8.5.4)
+        stream.end_path()
     if include_set_font:
         stream.set_font(font.name, font_scale)
     if include_set_spacing:
@@ -43,7 +47,7 @@ def layout_text_line(pdf, text, rect:Rect, font:Font, font_scale=1, include_set_
         if char_spacing != 0:
             stream.set_character_spacing(char_spacing)
     # Position the cursor for the first line
-    stream.move_text(rect.left + pad_x, rect.top - pad_y - font_scale)
+    stream.move_text(left + pad_x, top - pad_y - font_scale)
     stream.paint_text(String(text))
     return stream
 
@@ -61,7 +65,8 @@ def layout_text_multiline(pdf, text, rect:Rect, font:Font, font_scale=1, include
     :param rect: The area in which to render the text
     :param font: The font in which the text will be rendered
     :param include_clip_rect: If True, a `clip` operation will be included in the output stream, 
-        clipping to the bounds of `rect`
+        clipping to the bounds of `rect`. Path operators aren't allowed inside a text object, so if
+        the stream is going in one, leave this off and clip before the text object instead.
     :param include_set_font: If True, a `set_font` operation will be included in the output stream
     :param include_set_spacing: If True, a `set_word_spacing` operation and `set_character_spacing` 
         will be included in the output stream, if the corresponding parameters are not 0.
@@ -82,11 +87,14 @@ def layout_text_multiline(pdf, text, rect:Rect, font:Font, font_scale=1, include
         pad_x = pad_y = padding
     if leading is None:
         leading = font.leading
-    paragraphs = font.word_wrap(text, rect.width - pad_x * 2, font_scale, char_spacing=char_spacing, word_spacing=word_spacing)
+    left, bottom, right, top = map(float, rect.raw)
+    paragraphs = font.word_wrap(text, right - left - pad_x * 2, font_scale, char_spacing=char_spacing, word_spacing=word_spacing)
     stream = ContentStream()
     if include_clip_rect:
-        stream.append_rectangle(rect.left, rect.bottom, rect.width, rect.height)
+        stream.append_rectangle(left, bottom, right - left, top - bottom)
         stream.clip()
+        # A clip only takes effect at the end of the path (See 8.5.4)
+        stream.end_path()
     if include_set_font:
         stream.set_font(font.name, font_scale)
     if include_set_spacing:
@@ -95,16 +103,23 @@ def layout_text_multiline(pdf, text, rect:Rect, font:Font, font_scale=1, include
         if char_spacing != 0:
             stream.set_character_spacing(char_spacing)
     # Position the cursor for the first line
-    stream.move_text(rect.left + pad_x, rect.top - pad_y - font_scale)
+    stream.move_text(left + pad_x, top - pad_y - font_scale)
+    # The offsets from one line to the next, and from one paragraph to the next
+    line_offset = -leading - font_scale
+    paragraph_offset = line_offset * paragraph_spacing
+    # Each move is only emitted once there is another line to paint, so there is never a trailing
+    # one to remove (Undoing it instead would remove the first line's positioning if a paragraph 
+    # was empty)
+    pending_offset = None
     for paragraph in paragraphs:
         for line in paragraph:
+            if pending_offset is not None:
+                # Position the cursor at the start of the next line (offset from previous line)
+                # (I think we could use move_text_new_line or paint_text_line to simplify)
+                stream.move_text(0, pending_offset)
             stream.paint_text(String(line))
-            # Position the cursor at the start of the next line (offset from previous line)
-            # (I think we could use move_text_new_line or paint_text_line to simplify)
-            stream.move_text(0, -leading - font_scale)
-        # Replace line space with paragraph space
-        stream.undo()
-        stream.move_text(0, (-leading - font_scale) * paragraph_spacing) 
-    # Remove unnecessary final paragraph space
-    stream.undo()
+            pending_offset = line_offset
+        # Use paragraph space rather than line space before the next paragraph
+        if pending_offset is not None:
+            pending_offset = paragraph_offset
     return stream
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+import pytest
+from pikepdf import Pdf
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', 'example')
+
+
+@pytest.fixture
+def open_example():
+    """
+    Open one of the PDFs in ``example/pdfs`` by name.
+    """
+    def open_example(name):
+        return Pdf.open(os.path.join(EXAMPLE, 'pdfs', name))
+    return open_example
+
+
+@pytest.fixture
+def example_resource():
+    """
+    Get the path of one of the images in ``example/resources`` by name.
+    """
+    def example_resource(name):
+        return os.path.join(EXAMPLE, 'resources', name)
+    return example_resource
@@ -0,0 +1,67 @@
+import io
+import pytest
+from pikepdf import Pdf, Stream, String, parse_content_stream
+from pdform.model.content_stream import ContentStream, Operation, Operator, format_number
+
+
+def test_format_number_has_no_exponent():
+    assert format_number(2.842170943040401e-14) == b'0'
+    assert format_number(-2.842170943040401e-14) == b'0'
+    assert format_number(1.5e-05) == b'0.000015'
+    assert format_number(1e+20) == b'100000000000000000000'
+    # Numbers Python already writes in fixed-point are left as they are
+    assert format_number(107.67898832684826) == b'107.67898832684826'
+    assert format_number(0.0) == b'0.0'
+    assert format_number(3) == b'3'
+
+
+def test_tiny_operands_parse():
+    stream = ContentStream().move_text(-2.842170943040401e-14, 1e-20)
+    assert bytes(stream) == b'0 0 Td'
+    pdf = Pdf.new()
+    assert len(parse_content_stream(Stream(pdf, bytes(stream)))) == 1
+
+
+def test_shared_operations_are_immutable():
+    stream = ContentStream().push_stack()
+    operation = stream.undo()
+    assert operation == Operation(Operator.push_stack, ())
+    with pytest.raises(AttributeError):
+        operation.operands = (1,)
+    assert bytes(ContentStream().push_stack()) == b'q'
+
+
+def test_write_to_matches_bytes():
+    stream = ContentStream().push_stack().append_raw(b'/Tx BMC').move(1.5, 2).append_line(3, 4).stroke().pop_stack()
+    file = io.BytesIO()
+    stream.write_to(file)
+    assert file.getvalue() == bytes(stream)
+    empty = io.BytesIO()
+    ContentStream().write_to(empty)
+    assert empty.getvalue() == bytes(ContentStream()) == b''
+
+
+def test_append_polyline_matches_move_and_lines():
+    points = [(0, 0), (10, 0.5), (10, 10)]
+    expected = ContentStream().move(0, 0).append_line(10, 0.5).append_line(10, 10)
+    assert bytes(ContentStream().append_polyline(points)) == bytes(expected)
+    # Any iterable of points, including a one-off generator
+    assert bytes(ContentStream().append_polyline(iter(points))) == bytes(expected)
+    assert bytes(ContentStream().append_polyline([])) == b''
+
+
+def test_extend_operations_matches_operation():
+    text = String('Hello')
+    expected = ContentStream().operation('BT').operation('Td', 1, 2).operation('Tj', text).operation('ET')
+    stream = ContentStream().extend_operations([('BT',), ('Td', 1, 2), ('Tj', text), ('ET',)])
+    assert bytes(stream) == bytes(expected) == b'BT 1 2 Td (Hello) Tj ET'
+    with pytest.raises(ValueError):
+        ContentStream().extend_operations([('Nope', 1)])
+
+
+def test_operator_str_round_trip():
+    assert str(Operator.move) == 'm'
+    assert str(Operator.set_transform_matrix) == 'cm'
+    for operator in Operator:
+        assert Operator(str(operator)) is operator
+        assert bytes(Operation(operator, ())) == str(operator).encode()
@@ -0,0 +1,20 @@
+from pikepdf import Name
+from pdform.model.font import Font
+
+def test_word_wrap_has_no_empty_first_line(open_example):
+    pdf = open_example('VA9.pdf')
+    font = Font(pdf, pdf.Root.AcroForm.DR.Font.ArialMT, Name.ArialMT)
+    # The first word is wider than the line, so it goes on a line by itself
+    assert font.word_wrap('Supercalifragilistic word', 20, 10) == [['Supercalifragilistic', 'word']]
+    assert font.word_wrap('a b', 0, 10) == [['a', 'b']]
+
+
+def test_clear_cache(open_example):
+    pdf = open_example('VA9.pdf')
+    font = Font(pdf, pdf.Root.AcroForm.DR.Font.ArialMT, Name.ArialMT)
+    width = font.get_char_width('a')
+    font.raw.Widths[ord('a') - int(font.raw.FirstChar)] = width * 2
+    # Still the cached width until the cache is cleared
+    assert font.get_char_width('a') == width
+    font.clear_cache()
+    assert font.get_char_width('a') == width * 2
@@ -0,0 +1,46 @@
+from functools import cached_property
+from pdform.model.font import Font
+from pdform.model.form_field import Field, InputType
+from pdform.tools.form import fill_form, index_fields
+
+
+def test_fill_form_removes_the_signed_widget(open_example, example_resource):
+    # The signature widget on this page comes after a link and some radio buttons, which 
+    # `iter_fields` doesn't yield one for one, so its position in /Annots differs from its position
+    # among the fields
+    pdf = open_example('VBA-21-0966-ARE.pdf')
+    key, ((page, field, _),) = next(
+        (key, widgets) for key, widgets in index_fields(pdf).items()
+        if widgets[0][2] is InputType.signature
+    )
+    before = [annot.objgen for annot in page.Annots]
+    fill_form(pdf, {key: example_resource('sigtest.jpg')})
+    after = [annot.objgen for annot in page.Annots]
+    assert after == [objgen for objgen in before if objgen != field.raw.objgen]
+
+
+def test_fill_form_finds_each_input_type_once(open_example, example_resource, monkeypatch):
+    pdf = open_example('VA9.pdf')
+    lookups = []
+    input_type = Field.input_type
+    monkeypatch.setattr(Field, 'input_type', property(lambda field: lookups.append(field) or input_type.fget(field)))
+    index = index_fields(pdf)
+    indexing = len(lookups)
+    data = {key: 'x' for key, widgets in index.items() if widgets[0][2] is InputType.text}
+    lookups.clear()
+    fill_form(pdf, data)
+    # Filling indexes the fields again, but setting their values looks up nothing more
+    assert data and len(lookups) == indexing
+
+
+def test_fill_form_reads_each_font_once(open_example, monkeypatch):
+    pdf = open_example('VA9.pdf')
+    builds = []
+    width_table = Font._width_table.func
+    cached = cached_property(lambda font: builds.append(font.raw.objgen) or width_table(font))
+    cached.__set_name__(Font, '_width_table')
+    monkeypatch.setattr(Font, '_width_table', cached)
+    # Multiline fields measure their text to wrap it
+    data = {key: 'a few words to wrap' for key, widgets in index_fields(pdf).items() if widgets[0][2] is InputType.textarea}
+    fill_form(pdf, data)
+    assert len(data) > 1 and len(builds) == len(set(builds)) == 1
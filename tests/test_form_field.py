@@ -0,0 +1,65 @@
+import pytest
+from xml.etree import ElementTree
+from pikepdf import Name, Pdf
+from pdform.model.form_field import Field, FieldFlags, InputType, layout_form_text
+from pdform.model.rect import Rect
+from pdform.tools.form import index_fields
+
+def test_auto_size_is_refused(open_example):
+    # Rather than drawing the text at size 0
+    pdf = open_example('VA9.pdf')
+    with pytest.raises(NotImplementedError):
+        layout_form_text(pdf, 'hello world', b'/Helv 0 Tf 0 g', Rect.new(pdf, 0, 0, 200, 20))
+
+
+def text_field(pdf):
+    for widgets in index_fields(pdf).values():
+        _, field, input_type = widgets[0]
+        if input_type is InputType.text:
+            return field
+
+
+def test_password_flag(open_example):
+    pdf = open_example('VA9.pdf')
+    field = text_field(pdf)
+    # Bit 17 is Pushbutton, which means nothing for a text field
+    field.field_flags = field.field_flags | FieldFlags.Pushbutton
+    assert field.input_type is InputType.text
+    field.field_flags = field.field_flags | FieldFlags.Password
+    assert field.input_type is InputType.password
+
+
+def test_set_field_flags(open_example, tmp_path):
+    pdf = open_example('dd0293.pdf')
+    field = text_field(pdf)
+    field.field_flags = field.field_flags | FieldFlags.Multiline
+    # Every wrapper of the field sees the change
+    assert Field(pdf, field.raw).input_type is InputType.textarea
+    # and it is written as a plain integer
+    path = tmp_path / 'flags.pdf'
+    pdf.save(path)
+    with Pdf.open(path) as saved:
+        _, saved_field, _ = index_fields(saved)[field.qualified_name][0]
+        assert saved_field.input_type is InputType.textarea
+
+
+def test_rich_value_is_escaped(open_example):
+    pdf = open_example('VA9.pdf')
+    field = text_field(pdf)
+    # The style of this field quotes its font name
+    assert FieldFlags.RichText in field.field_flags and '"' in str(field.raw.DS)
+    field.set_value('Tom & Jerry\n<3')
+    body = ElementTree.fromstring(str(field.raw.RV))
+    paragraphs = body.findall('{http://www.w3.org/1999/xhtml}p')
+    assert [p.text for p in paragraphs] == ['Tom & Jerry', '<3']
+    assert paragraphs[0].get('style') == str(field.raw.DS)
+
+
+@pytest.mark.parametrize('value', [b'/1', b'1', '/1', '1', Name('/1')])
+def test_checkbox_state_names(open_example, value):
+    pdf = open_example('dd0293.pdf')
+    _, field, _ = index_fields(pdf)['form1[0].page1[0].CheckBox1[0]'][0]
+    field.set_value(value)
+    assert field.raw.V == field.raw.AS == Name('/1')
+    with pytest.raises(ValueError):
+        field.set_value(b'/Maybe')
@@ -0,0 +1,89 @@
+import base64
+import pytest
+from pikepdf import Name, Pdf, PdfImage, parse_content_stream
+from PIL import Image
+from pdform.model.rect import Rect
+from pdform.tools.stamp import _FileCache, stamp
+
+
+def blank_pdf():
+    pdf = Pdf.new()
+    pdf.add_blank_page()
+    return pdf
+
+
+def test_placement_parses(tmp_path):
+    # Centring this image in this rect leaves a rounding error of around -3e-14 in x
+    path = tmp_path / 'wide.png'
+    Image.new('RGB', (1335, 778), 'black').save(path)
+    pdf = blank_pdf()
+    stamp(str(path), pdf.pages[0], Rect.new(pdf, 0, 0, 461, 484), pdf=pdf)
+    operators = [str(instruction.operator) for instruction in parse_content_stream(pdf.pages[0])]
+    assert operators == ['q', 'Q', 'q', 'cm', 'Do', 'Q']
+
+
+def stamped_image(pdf):
+    xobject = next(iter(pdf.pages[0].Resources.XObject.values()))
+    if xobject.Subtype == Name.Form:
+        # Converted through PIL; the image is inside the form XObject
+        xobject = next(iter(xobject.Resources.XObject.values()))
+    return xobject
+
+
+def test_transparent_jpeg_masks_near_white(example_resource):
+    pdf = blank_pdf()
+    stamp(example_resource('sigtest.jpg'), pdf.pages[0], Rect.new(pdf, 0, 0, 200, 100), transparent_background=True, pdf=pdf)
+    image = stamped_image(pdf)
+    # Still embedded unchanged, with a color key that allows for compression noise
+    assert image.Filter == Name.DCTDecode
+    assert list(image.Mask) == [240, 255] * 3
+
+
+def test_transparent_background_without_pdf(tmp_path):
+    path = tmp_path / 'dots.png'
+    img = Image.new('RGB', (3, 1), 'white')
+    img.putpixel((1, 0), (0, 0, 0))
+    img.putpixel((2, 0), (250, 245, 250))
+    img.save(path)
+    pdf = blank_pdf()
+    stamp(str(path), pdf.pages[0], Rect.new(pdf, 0, 0, 30, 10), transparent_background=True)
+    alpha = PdfImage(stamped_image(pdf)).as_pil_image().getchannel('A')
+    assert [alpha.getpixel((x, 0)) for x in range(3)] == [0, 255, 0]
+
+
+def test_stamp_adds_one_resource(example_resource):
+    pdf = blank_pdf()
+    stamp(example_resource('duck.jpg'), pdf.pages[0], Rect.new(pdf, 0, 0, 100, 100))
+    assert len(pdf.pages[0].Resources.XObject.keys()) == 1
+
+
+def test_stamp_data_url(example_resource):
+    with open(example_resource('duck.jpg'), 'rb') as file:
+        url = 'data:image/jpeg;base64,' + base64.b64encode(file.read()).decode()
+    pdf = blank_pdf()
+    stamp(url, pdf.pages[0], Rect.new(pdf, 0, 0, 100, 100), pdf=pdf)
+    stamp(url, pdf.pages[0], Rect.new(pdf, 0, 0, 100, 100))
+    assert len(pdf.pages[0].Resources.XObject.keys()) == 2
+    with pytest.raises(ValueError):
+        stamp('data:image/jpeg,not-base64', pdf.pages[0], Rect.new(pdf, 0, 0, 100, 100))
+
+
+def test_file_cache_is_bounded_by_size():
+    calls = []
+    cache = _FileCache(10)
+    @cache
+    def load(path, mtime_ns):
+        calls.append(path)
+        return b'x' * int(path)
+    for path in ['4', '4', '5', '4']:
+        load(path, 0)
+    assert calls == ['4', '5']
+    # Over the budget, so the least recently used (the 5 bytes) makes way
+    load('6', 0)
+    load('4', 0)
+    load('5', 0)
+    assert calls == ['4', '5', '6', '5']
+    # Larger than the whole budget, so never kept
+    load('11', 0)
+    load('11', 0)
+    assert calls[-2:] == ['11', '11']
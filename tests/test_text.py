@@ -0,0 +1,30 @@
+from pikepdf import Name, Stream, parse_content_stream
+from pdform.model.font import Font
+from pdform.model.rect import Rect
+from pdform.utils.text import layout_text_multiline
+
+def arial(pdf):
+    return Font(pdf, pdf.Root.AcroForm.DR.Font.ArialMT, Name.ArialMT)
+
+
+def painted_lines(pdf, stream):
+    """
+    The ``(y, text)`` of each line painted by the stream.
+    """
+    y = 0
+    lines = []
+    for operands, operator in parse_content_stream(Stream(pdf, bytes(stream))):
+        if str(operator) == 'Td':
+            y += float(operands[1])
+        elif str(operator) == 'Tj':
+            lines.append((y, str(operands[0])))
+    return lines
+
+
+def test_multiline_starts_at_the_top(open_example):
+    pdf = open_example('VA9.pdf')
+    rect = Rect.new(pdf, 0, 0, 100, 50)
+    # The first line's move used to be undone when the text was empty or began with a blank line
+    assert bytes(layout_text_multiline(pdf, '', rect, arial(pdf), 10)).endswith(b'0.0 40.0 Td')
+    stream = layout_text_multiline(pdf, '\nhello\nworld', rect, arial(pdf), 10)
+    assert [y for y, _ in painted_lines(pdf, stream)] == [40, 30]